@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Long-lived benchmark server used by compare_execution.py.
+
+Imports the tool under test once, then runs it in-process for every request
+so that benchmark iterations measure test execution rather than interpreter
+startup. Speaks the same length-prefixed MessagePack protocol as
+src/worker.py.
+
+Usage: bench_server.py {taut,pytest} [tool args...]
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import traceback
+
+import msgpack
+
+
+def _read_message(stream):
+    """Read length-prefixed msgpack message from stream."""
+    len_bytes = stream.read(4)
+    if not len_bytes or len(len_bytes) < 4:
+        return None
+
+    length = struct.unpack('<I', len_bytes)[0]
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+
+    return msgpack.unpackb(data, raw=False)
+
+
+def _send_message(stream, msg):
+    """Send length-prefixed msgpack message to stream."""
+    data = msgpack.packb(msg, use_bin_type=True)
+    length = struct.pack('<I', len(data))
+    stream.write(length + data)
+    stream.flush()
+
+
+def _spawn_and_wait(argv):
+    """Run argv to completion and return its exit code.
+
+    posix_spawn skips subprocess's Popen bookkeeping, and on Linux avoids
+    duplicating this (msgpack/pytest-sized) process's page tables for fork.
+    Output goes to the devnull fds installed by main().
+    """
+    if not hasattr(os, "posix_spawnp"):
+        return subprocess.call(argv)
+    pid = os.posix_spawnp(argv[0], argv, os.environ)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def _load_pytest():
+    import pytest
+
+    def run(args):
+        try:
+            return pytest.main(args)
+        except SystemExit as e:
+            return e.code
+
+    return run
+
+
+def _load_taut():
+    try:
+        from taut._taut import run as taut_run
+    except ImportError:
+        # Extension not built into this interpreter; fall back to the binary
+        binary = shutil.which("taut")
+        if binary is None:
+            raise RuntimeError("taut._taut is not importable and no taut binary is on PATH")
+        print(
+            f"warning: taut._taut is not importable, launching {binary} for every run; "
+            "taut timings include process startup and usage errors exit with 1",
+            file=sys.stderr,
+        )
+        return lambda args: _spawn_and_wait([binary, *args])
+
+    return lambda args: taut_run(["taut", *args])
+
+
+_LOADERS = {"pytest": _load_pytest, "taut": _load_taut}
+
+
+def _evict_project_modules(path, before):
+    """Drop modules imported from under path since the before snapshot.
+
+    In-process pytest would otherwise find the test modules already in
+    sys.modules on the next run and skip importing (and assertion-rewriting)
+    them, while taut executes every test module on every run.
+    """
+    root = os.path.join(os.path.realpath(path), "")
+    for name in set(sys.modules) - before:
+        file = getattr(sys.modules[name], "__file__", None)
+        if file and os.path.realpath(file).startswith(root):
+            del sys.modules[name]
+
+
+def main():
+    tool = sys.argv[1]
+    tool_args = sys.argv[2:]
+
+    # Load the tool while stderr is still attached, so an ImportError or other
+    # startup failure is visible instead of a bare "server exited unexpectedly".
+    run = _LOADERS[tool]()
+
+    # Keep private copies of the protocol pipes and point fds 0-2 at devnull,
+    # so output from the tool (or anything it spawns) can't corrupt the stream.
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    while True:
+        req = _read_message(proto_in)
+        if not req or req.get("cmd") == "shutdown":
+            break
+
+        if req.get("cmd") == "ping":
+            _send_message(proto_out, {"pong": True})
+            continue
+
+        path = req["path"]
+        os.chdir(path)
+        before = set(sys.modules)
+        try:
+            code = run([*tool_args, path])
+        except Exception:
+            # stderr is devnull by now; hand the traceback to the harness
+            reply = {"error": traceback.format_exc()}
+        else:
+            reply = {"exit_code": int(code or 0)}
+        _evict_project_modules(path, before)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        _send_message(proto_out, reply)
+
+
+if __name__ == "__main__":
+    main()
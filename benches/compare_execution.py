@@ -1,127 +1,289 @@
 #!/usr/bin/env python3
 """Compare taut execution modes vs pytest on actual test runs."""
 
+import argparse
+import ast
+import importlib.util
 import subprocess
+import struct
+import sys
 import tempfile
 import os
+import statistics
 import time
 import json
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
+from typing import NamedTuple
 
-def create_noop_test_project(num_tests: int = 60) -> Path:
-    """Create test project with noop tests."""
+import msgpack
+
+_SERVER_SCRIPT = Path(__file__).with_name("bench_server.py")
+_WORKER_SCRIPT = Path(__file__).parent.parent / "src" / "worker.py"
+
+def create_noop_test_project(num_tests: int = 60) -> tuple[Path, int]:
+    """Create test project with noop tests; return (project_dir, test_count)."""
     tmpdir = Path(tempfile.mkdtemp())
 
     # Create test file with noop tests
     test_file = tmpdir / "test_noop.py"
-    content = 'import time\n\n'
+    parts = ['import time\n\n']
 
     # Half plain functions, half class methods
-    for i in range(num_tests // 2):
-        content += f'def test_noop_{i}():\n    pass\n\n'
+    parts.extend(f'def test_noop_{i}():\n    pass\n\n' for i in range(num_tests // 2))
 
-    content += 'class TestNoop:\n'
-    for i in range(num_tests // 2):
-        content += f'    def test_method_{i}(self):\n        pass\n\n'
+    parts.append('class TestNoop:\n')
+    parts.extend(f'    def test_method_{i}(self):\n        pass\n\n' for i in range(num_tests // 2))
 
-    test_file.write_text(content)
-    return tmpdir
+    test_file.write_text(''.join(parts))
+    return tmpdir, 2 * (num_tests // 2)
 
 
-def benchmark_taut_process_per_test(project_dir: Path, iterations: int = 3) -> float:
-    """Benchmark taut with process-per-test isolation."""
-    times = []
-    for _ in range(iterations):
-        start = time.perf_counter()
-        result = subprocess.run(
-            ["taut", "tests", "--isolation", "process-per-test", str(project_dir)],
-            capture_output=True,
-            timeout=60,
-            cwd=str(project_dir)
-        )
-        elapsed = time.perf_counter() - start
-        times.append(elapsed)
+class BenchRunner:
+    """Long-lived benchmark server for one tool.
 
-    avg = sum(times) / len(times)
-    return avg * 1000  # ms
+    The server process (bench_server.py) is spawned on first use and imports
+    the tool once; each iteration then sends the project path over the
+    length-prefixed msgpack protocol used by src/worker.py and times only the
+    request/reply round-trip.
+    """
 
+    tool = None
 
-def benchmark_taut_process_per_run(project_dir: Path, iterations: int = 3) -> float:
-    """Benchmark taut with process-per-run isolation (worker pool)."""
-    times = []
-    for _ in range(iterations):
-        start = time.perf_counter()
-        result = subprocess.run(
-            ["taut", "tests", "--isolation", "process-per-run", str(project_dir)],
-            capture_output=True,
-            timeout=60,
-            cwd=str(project_dir)
-        )
-        elapsed = time.perf_counter() - start
-        times.append(elapsed)
+    def __init__(self, *args: str):
+        self.args = list(args)
+        self._proc = None
 
-    avg = sum(times) / len(times)
-    return avg * 1000  # ms
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
-def benchmark_pytest(project_dir: Path, iterations: int = 3) -> float:
-    """Benchmark pytest execution."""
-    times = []
-    for _ in range(iterations):
-        start = time.perf_counter()
-        result = subprocess.run(
-            ["pytest", "-q", str(project_dir)],
-            capture_output=True,
-            timeout=60,
-            cwd=str(project_dir)
+    def _command(self) -> list[str]:
+        return [sys.executable, str(_SERVER_SCRIPT), self.tool, *self.args]
+
+    def _ensure_started(self):
+        if self._proc is not None:
+            return
+        self._proc = subprocess.Popen(
+            self._command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
         )
-        elapsed = time.perf_counter() - start
-        times.append(elapsed)
+        # Wait for the server to finish importing before timing anything
+        self._send({"cmd": "ping"})
+        self._recv()
+
+    def _send(self, msg):
+        data = msgpack.packb(msg, use_bin_type=True)
+        self._proc.stdin.write(struct.pack('<I', len(data)) + data)
+        self._proc.stdin.flush()
+
+    def _recv(self):
+        len_bytes = self._proc.stdout.read(4)
+        if len(len_bytes) < 4:
+            raise RuntimeError(f"{self.tool} bench server exited unexpectedly")
+        length = struct.unpack('<I', len_bytes)[0]
+        return msgpack.unpackb(self._proc.stdout.read(length), raw=False)
+
+    def run(self, project_dir: Path) -> int:
+        """Run the tool once on project_dir; return elapsed nanoseconds."""
+        self._ensure_started()
+        start = time.perf_counter_ns()
+        self._send({"cmd": "run", "path": str(project_dir)})
+        reply = self._recv()
+        elapsed = time.perf_counter_ns() - start
+        if "error" in reply:
+            raise RuntimeError(f"{self.tool} bench server failed during a run:\n{reply['error']}")
+        # 0 = all passed, 1 = some tests failed; anything else means the tool
+        # didn't run the tests (usage or internal error), so don't time it
+        if reply["exit_code"] not in (0, 1):
+            raise RuntimeError(f"{self.tool} {' '.join(self.args)} exited with code {reply['exit_code']}")
+        return elapsed
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._send({"cmd": "shutdown"})
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.wait(timeout=60)
+        self._proc = None
 
-    avg = sum(times) / len(times)
-    return avg * 1000  # ms
 
+class TautRunner(BenchRunner):
+    tool = "taut"
 
-def benchmark_pytest_parallel(project_dir: Path, iterations: int = 3, workers: int = 4) -> float:
-    """Benchmark pytest with parallel execution."""
-    times = []
-    for _ in range(iterations):
-        start = time.perf_counter()
-        result = subprocess.run(
-            ["pytest", "-n", str(workers), "-q", str(project_dir)],
-            capture_output=True,
-            timeout=60,
-            cwd=str(project_dir)
-        )
-        elapsed = time.perf_counter() - start
-        times.append(elapsed)
 
-    avg = sum(times) / len(times)
-    return avg * 1000  # ms
+class PytestRunner(BenchRunner):
+    tool = "pytest"
 
 
-def get_test_count(project_dir: Path) -> int:
-    """Get number of tests in project."""
-    result = subprocess.run(
-        ["pytest", "--collect-only", "-q", str(project_dir)],
-        capture_output=True,
-        timeout=30
-    )
-    output = result.stdout.decode()
-    # Last line shows count
-    lines = [l.strip() for l in output.split('\n') if l.strip()]
-    if lines:
-        # Try to extract number from last line like "60 tests collected"
-        last = lines[-1]
-        try:
-            return int(last.split()[0])
-        except:
-            pass
-    return 60  # default
+class WorkerRunner(BenchRunner):
+    """Drive src/worker.py directly, keeping one warm worker for all iterations.
+
+    This is the process taut keeps resident in process-per-run mode; each
+    iteration sends one request per test in the project, so the timing covers
+    per-test worker cost without taut's discovery or process orchestration.
+    """
+
+    tool = "worker"
+
+    def _command(self) -> list[str]:
+        return [sys.executable, "-u", str(_WORKER_SCRIPT)]
+
+    def run(self, project_dir: Path) -> int:
+        """Run every test in project_dir once; return elapsed nanoseconds."""
+        self._ensure_started()
+        requests = _worker_requests(project_dir)
+        start = time.perf_counter_ns()
+        replies = []
+        for req in requests:
+            self._send(req)
+            replies.append(self._recv())
+        elapsed = time.perf_counter_ns() - start
+        # The generated tests all pass, so a failure (including a "Worker
+        # error:" reply for a bad request) means the timing is meaningless
+        for req, reply in zip(requests, replies):
+            if not reply["passed"]:
+                raise RuntimeError(f"worker failed {req['file']}::{req['function']}: {reply['error']['message']}")
+        return elapsed
+
+
+def _worker_requests(project_dir: Path) -> list[dict]:
+    """Build worker run requests for the tests in a generated project."""
+    requests = []
+
+    def add(path, function, class_name=None):
+        req = {"id": len(requests) + 1, "file": str(path), "function": function, "collect_coverage": False}
+        if class_name:
+            req["class"] = class_name
+        requests.append(req)
+
+    for path in sorted(project_dir.glob("test_*.py")):
+        for node in ast.parse(path.read_text()).body:
+            if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+                add(path, node.name)
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                for item in node.body:
+                    if isinstance(item, ast.FunctionDef) and item.name.startswith("test_"):
+                        add(path, item.name, node.name)
 
+    return requests
 
-def create_realistic_test_project(num_tests: int = 50) -> Path:
-    """Create test project with realistic tests (math, string ops, JSON)."""
+
+class Timing(NamedTuple):
+    """Median and interquartile range of a benchmark's samples, in ms."""
+
+    median: float
+    q1: float
+    q3: float
+
+
+def _benchmark(runner: BenchRunner, project_dir: Path, iterations: int) -> Timing:
+    with runner:
+        # Discard a warm-up run so cold caches don't skew the samples
+        runner.run(project_dir)
+        times = [runner.run(project_dir) / 1e6 for _ in range(iterations)]
+
+    median = statistics.median(times)
+    if len(times) < 2:
+        return Timing(median, median, median)
+    q1, _, q3 = statistics.quantiles(times, n=4, method="inclusive")
+    return Timing(median, q1, q3)
+
+
+def benchmark_taut_process_per_test(project_dir: Path, iterations: int = 3) -> Timing:
+    """Benchmark taut with process-per-test isolation."""
+    runner = TautRunner("tests", "--no-cache", "--isolation", "process-per-test")
+    return _benchmark(runner, project_dir, iterations)
+
+
+def benchmark_taut_process_per_run(project_dir: Path, iterations: int = 3) -> Timing:
+    """Benchmark taut with process-per-run isolation (worker pool)."""
+    runner = TautRunner("tests", "--no-cache", "--isolation", "process-per-run")
+    return _benchmark(runner, project_dir, iterations)
+
+
+def benchmark_taut_persistent(project_dir: Path, iterations: int = 3) -> Timing:
+    """Benchmark a single resident taut worker reused across iterations."""
+    return _benchmark(WorkerRunner(), project_dir, iterations)
+
+
+def benchmark_pytest(project_dir: Path, iterations: int = 3) -> Timing:
+    """Benchmark pytest execution."""
+    runner = PytestRunner("-q")
+    return _benchmark(runner, project_dir, iterations)
+
+
+def benchmark_pytest_parallel(project_dir: Path, iterations: int = 3, workers: int = 4) -> Timing:
+    """Benchmark pytest with parallel execution."""
+    runner = PytestRunner("-n", str(workers), "-q")
+    return _benchmark(runner, project_dir, iterations)
+
+
+_BENCHMARKS = {
+    "taut-ppt": benchmark_taut_process_per_test,
+    "taut-ppr": benchmark_taut_process_per_run,
+    "taut-worker": benchmark_taut_persistent,
+    "pytest": benchmark_pytest,
+    "pytest-parallel": benchmark_pytest_parallel,
+}
+
+
+def _run_one(spec) -> Timing | None:
+    """Thread pool worker: run one (name, project_dir, iterations) benchmark spec."""
+    name, project_dir, iterations = spec
+    if name == "pytest-parallel" and importlib.util.find_spec("xdist") is None:
+        # pytest-xdist is optional; without it `-n` is a usage error
+        return None
+    return _BENCHMARKS[name](project_dir, iterations)
+
+
+def run_benchmarks(project_dirs: dict, iterations: dict, concurrent: bool = False) -> dict:
+    """Run all benchmark configurations, one after another.
+
+    With concurrent=True every configuration runs at once on its own thread
+    (each only blocks on its bench server's pipe). That finishes sooner but the
+    configurations compete for the same cores, so the timings measure
+    contention and must not be compared against each other. Every
+    configuration gets its own project directory (created by the caller) so
+    concurrent runs don't share caches or __pycache__.
+    """
+    specs = [(name, project_dirs[name], iterations[name]) for name in _BENCHMARKS]
+    if not concurrent:
+        return dict(zip(_BENCHMARKS, map(_run_one, specs)))
+    with ThreadPool(len(specs)) as tp:
+        results = tp.map(_run_one, specs)
+    return dict(zip(_BENCHMARKS, results))
+
+
+_LABELS = {
+    "taut-ppt": "Taut (process-per-test):",
+    "taut-ppr": "Taut (process-per-run):",
+    "taut-worker": "Taut (resident worker):",
+    "pytest": "Pytest (sequential):",
+    "pytest-parallel": "Pytest (4-worker parallel):",
+}
+
+
+def print_results(results: dict, test_count: int):
+    """Print one line per configuration: median total, per-test, and IQR."""
+    for name, label in _LABELS.items():
+        t = results[name]
+        if t is None:
+            continue
+        print(f"{label:<28}{t.median:7.1f} ms  ({t.median/test_count:.2f} ms/test, IQR {t.q1:.1f}-{t.q3:.1f} ms)")
+
+
+def create_realistic_test_project(num_tests: int = 50) -> tuple[Path, int]:
+    """Create test project with realistic tests (math, string ops, JSON).
+
+    Returns (project_dir, test_count).
+    """
     tmpdir = Path(tempfile.mkdtemp())
 
     modules = {
@@ -156,63 +318,65 @@ def test_list_{i}():
     for filename, content in modules.items():
         (tmpdir / filename).write_text(content)
 
-    return tmpdir
+    return tmpdir, len(modules) * (num_tests // 4)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="run all configurations at the same time (quick smoke run; the "
+        "configurations share cores, so timings are NOT suitable for comparisons)",
+    )
+    opts = parser.parse_args()
+    if opts.concurrent:
+        print("WARNING: --concurrent runs configurations against each other; "
+              "timings below are not suitable for comparisons.\n")
+
     print("=" * 90)
     print("BENCHMARK 1: NOOP TESTS (minimal overhead measurement)")
     print("=" * 90)
 
-    # Create noop test project
-    noop_dir = create_noop_test_project(60)
-    noop_count = get_test_count(noop_dir)
+    # Create one noop test project per configuration
+    noop_dirs = {}
+    for name in _BENCHMARKS:
+        noop_dirs[name], noop_count = create_noop_test_project(60)
 
     print(f"\nTest Project: {noop_count} noop tests (just `pass` statements)")
-    print(f"Location: {noop_dir}\n")
+    for name, path in noop_dirs.items():
+        print(f"Location ({name}): {path}")
 
-    print("Running benchmarks (3 iterations each)...\n")
+    print("\nRunning benchmarks (3 iterations each after a warm-up run)...\n")
 
-    noop_taut_ppe = benchmark_taut_process_per_test(noop_dir)
-    noop_taut_ppr = benchmark_taut_process_per_run(noop_dir)
-    noop_pytest = benchmark_pytest(noop_dir)
+    noop = run_benchmarks(noop_dirs, {"taut-ppt": 3, "taut-ppr": 3, "taut-worker": 3, "pytest": 3, "pytest-parallel": 2}, opts.concurrent)
+    noop_taut_ppe = noop["taut-ppt"].median
+    noop_taut_ppr = noop["taut-ppr"].median
+    noop_taut_worker = noop["taut-worker"].median
+    noop_pytest = noop["pytest"].median
 
-    print(f"Taut (process-per-test):    {noop_taut_ppe:7.1f} ms  ({noop_taut_ppe/noop_count:.2f} ms/test)")
-    print(f"Taut (process-per-run):     {noop_taut_ppr:7.1f} ms  ({noop_taut_ppr/noop_count:.2f} ms/test)")
-    print(f"Pytest (sequential):        {noop_pytest:7.1f} ms  ({noop_pytest/noop_count:.2f} ms/test)")
-
-    try:
-        noop_pytest_parallel = benchmark_pytest_parallel(noop_dir, iterations=2)
-        print(f"Pytest (4-worker parallel): {noop_pytest_parallel:7.1f} ms  ({noop_pytest_parallel/noop_count:.2f} ms/test)")
-    except Exception as e:
-        noop_pytest_parallel = None
+    print_results(noop, noop_count)
 
     print("\n" + "=" * 90)
     print("BENCHMARK 2: REALISTIC TESTS (with actual work)")
     print("=" * 90)
 
-    # Create realistic test project
-    realistic_dir = create_realistic_test_project(50)
-    realistic_count = get_test_count(realistic_dir)
+    # Create one realistic test project per configuration
+    realistic_dirs = {}
+    for name in _BENCHMARKS:
+        realistic_dirs[name], realistic_count = create_realistic_test_project(50)
 
     print(f"\nTest Project: {realistic_count} realistic tests (math, string ops, JSON parsing)")
-    print(f"Location: {realistic_dir}\n")
-
-    print("Running benchmarks (2 iterations each, these take longer)...\n")
+    for name, path in realistic_dirs.items():
+        print(f"Location ({name}): {path}")
 
-    real_taut_ppe = benchmark_taut_process_per_test(realistic_dir, iterations=2)
-    real_taut_ppr = benchmark_taut_process_per_run(realistic_dir, iterations=2)
-    real_pytest = benchmark_pytest(realistic_dir, iterations=2)
+    print("\nRunning benchmarks (2 iterations each after a warm-up run, these take longer)...\n")
 
-    print(f"Taut (process-per-test):    {real_taut_ppe:7.1f} ms  ({real_taut_ppe/realistic_count:.2f} ms/test)")
-    print(f"Taut (process-per-run):     {real_taut_ppr:7.1f} ms  ({real_taut_ppr/realistic_count:.2f} ms/test)")
-    print(f"Pytest (sequential):        {real_pytest:7.1f} ms  ({real_pytest/realistic_count:.2f} ms/test)")
+    real = run_benchmarks(realistic_dirs, {"taut-ppt": 2, "taut-ppr": 2, "taut-worker": 2, "pytest": 2, "pytest-parallel": 1}, opts.concurrent)
+    real_taut_ppr = real["taut-ppr"].median
+    real_pytest = real["pytest"].median
 
-    try:
-        real_pytest_parallel = benchmark_pytest_parallel(realistic_dir, iterations=1)
-        print(f"Pytest (4-worker parallel): {real_pytest_parallel:7.1f} ms  ({real_pytest_parallel/realistic_count:.2f} ms/test)")
-    except Exception as e:
-        real_pytest_parallel = None
+    print_results(real, realistic_count)
 
     print("\n" + "=" * 90)
     print("SUMMARY")
@@ -236,6 +400,7 @@ if __name__ == "__main__":
     print(f"\nWORKER POOL EFFICIENCY:")
     print(f"  Process-per-test: {noop_taut_ppe/noop_count:.2f}ms/test (per-process startup)")
     print(f"  Process-per-run:  {noop_taut_ppr/noop_count:.2f}ms/test (worker reuse)")
+    print(f"  Resident worker:  {noop_taut_worker/noop_count:.2f}ms/test (no startup)")
     print(f"  Efficiency gain:  {noop_taut_ppe/noop_taut_ppr:.1f}x")
 
     print("\n" + "=" * 90)
@@ -22,19 +22,17 @@ def create_test_project(num_files: int, tests_per_file: int) -> Path:
             filepath = module_path / filename
 
             # Create test file
-            content = f'# {filename}\n"""Test module."""\n\n'
+            parts = [f'# {filename}\n"""Test module."""\n\n']
 
             # Plain function tests
-            for j in range(tests_per_file // 2):
-                content += f'def test_{module}_{j}():\n    assert True\n\n'
+            parts.extend(f'def test_{module}_{j}():\n    assert True\n\n' for j in range(tests_per_file // 2))
 
             # Class-based tests
             class_name = module.capitalize()
-            content += f'class Test{class_name}:\n'
-            for j in range(tests_per_file // 2):
-                content += f'    def test_method_{j}(self):\n        assert True\n\n'
+            parts.append(f'class Test{class_name}:\n')
+            parts.extend(f'    def test_method_{j}(self):\n        assert True\n\n' for j in range(tests_per_file // 2))
 
-            filepath.write_text(content)
+            filepath.write_text(''.join(parts))
 
     return tmpdir
 
@@ -125,13 +125,26 @@ pub fn run_with_args(args: Vec<String>) -> i32 {
 /// Run the CLI with parsed arguments.
 /// Returns the exit code.
 fn run_with_parsed_args(args: Args) -> i32 {
+    match try_run_with_parsed_args(args) {
+        Ok(code) => code,
+        Err(e) => {
+            eprintln!("Error: {}", e);
+            1
+        }
+    }
+}
+
+/// Run the CLI with parsed arguments.
+/// Returns the exit code (0 for success, 1 for test failures), or the error
+/// instead of folding it into exit code 1.
+pub fn try_run_with_parsed_args(args: Args) -> Result<i32> {
     // Handle markdown help generation
     if args.markdown_help {
         print!("{}", clap_markdown::help_markdown::<Args>());
-        return 0;
+        return Ok(0);
     }
 
-    let result = match args.command {
+    match args.command {
         Some(Commands::List { paths, filter }) => list_tests(&paths, filter.as_deref()),
         Some(Commands::Watch {
             paths,
@@ -150,14 +163,6 @@ fn run_with_parsed_args(args: Args) -> i32 {
         ),
         Some(Commands::Cache { action }) => handle_cache_command(action),
         None => run_tests(args),
-    };
-
-    match result {
-        Ok(code) => code,
-        Err(e) => {
-            eprintln!("Error: {}", e);
-            1
-        }
     }
 }
 
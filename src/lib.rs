@@ -23,10 +23,38 @@ fn main() {
     std::process::exit(code);
 }
 
+/// Run the CLI with explicit arguments and return the exit code.
+/// Unlike `main`, this does not exit the interpreter, so it can be called
+/// repeatedly from a long-lived process (used by the benchmark harness).
+///
+/// Argument errors return clap's exit code (2) and internal errors return 2,
+/// so callers can tell them apart from test failures (1).
+#[cfg(feature = "extension-module")]
+#[pyfunction]
+fn run(args: Vec<String>) -> i32 {
+    use clap::Parser;
+
+    let args = match cli::Args::try_parse_from(args) {
+        Ok(args) => args,
+        Err(e) => {
+            let _ = e.print();
+            return e.exit_code();
+        }
+    };
+    match cli::try_run_with_parsed_args(args) {
+        Ok(code) => code,
+        Err(e) => {
+            eprintln!("Error: {}", e);
+            2
+        }
+    }
+}
+
 /// PyO3 module definition
 #[cfg(feature = "extension-module")]
 #[pymodule]
 fn _taut(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(main, m)?)?;
+    m.add_function(wrap_pyfunction!(run, m)?)?;
     Ok(())
 }
@@ -1,26 +1,105 @@
 import sys
 import struct
 import traceback
-import importlib.util
+import types
 import inspect
 import asyncio
 import io
-import contextlib
+import functools
+import itertools
 import os
 import time
 import msgpack
 
 
+# Compiled test files, keyed by (path, mtime_ns, size) so edits are picked up
+_CODE_CACHE = {}
+
+
+def _compile_test_file(test_file):
+    st = os.stat(test_file)
+    key = (test_file, st.st_mtime_ns, st.st_size)
+    code = _CODE_CACHE.get(key)
+    if code is None:
+        with open(test_file, "rb") as f:
+            code = compile(f.read(), test_file, "exec", dont_inherit=True)
+        _CODE_CACHE[key] = code
+    return code
+
+
+# Test directories already on sys.path, so the per-test check is a set lookup
+# rather than a scan of sys.path
+_SYSPATH_SET = set(sys.path)
+
+# Test output is captured by swapping these out directly; contextlib's
+# redirect_stdout/redirect_stderr add two context managers per test.
+_REAL_STDOUT = sys.stdout
+_REAL_STDERR = sys.stderr
+
+
+class _LazyTraceback:
+    """Traceback text for an exception, formatted only when serialized.
+
+    Formatting walks every frame and reads source lines, so deferring it
+    keeps that work out of the test's duration and coverage window.
+    """
+
+    __slots__ = ("_exc", "_text")
+
+    def __init__(self, exc):
+        self._exc = exc
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            exc = self._exc
+            self._text = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+            # Release the frames held by the traceback
+            self._exc = None
+        return self._text
+
+
 def _run_maybe_async(callable_obj):
     result = callable_obj()
     if inspect.isawaitable(result):
         asyncio.run(result)
 
 
+# sys.monitoring tool ids run from 0 to 5; 0 is reserved for debuggers
+_MAX_TOOL_ID = 5
+
+# Path fragments identifying stdlib and third-party code
+_SKIP_MARKERS = ("site-packages", "lib/python", "/usr/lib")
+
+
+# Called for every traced event, but a process only sees a few hundred
+# distinct filenames, so the classification is cached.
+@functools.lru_cache(maxsize=4096)
 def _should_track(filename):
     if not filename or filename.startswith("<"):
         return False
-    return not any(x in filename for x in ["site-packages", "lib/python", "/usr/lib"])
+    for marker in _SKIP_MARKERS:
+        if marker in filename:
+            return False
+    return True
+
+
+# co_filename -> absolute path, shared by both coverage collectors
+_ABS_CACHE = {}
+
+# Covered lines are kept per file as a bytearray indexed by line number
+# (1 = executed): one byte per line instead of a set entry per line, and
+# already in order when converted to a list.
+_LINE_MAP_SLACK = 1024
+
+
+def _record_line(executed_lines, abs_path, line_number):
+    lines = executed_lines.get(abs_path)
+    if lines is None:
+        lines = executed_lines[abs_path] = bytearray(line_number + _LINE_MAP_SLACK)
+    elif line_number >= len(lines):
+        lines.extend(bytes(line_number + _LINE_MAP_SLACK - len(lines)))
+    lines[line_number] = 1
 
 
 def _collect_coverage_with_settrace():
@@ -30,8 +109,10 @@ def _collect_coverage_with_settrace():
         if event == "line":
             filename = frame.f_code.co_filename
             if _should_track(filename):
-                abs_path = os.path.abspath(filename)
-                executed_lines.setdefault(abs_path, set()).add(frame.f_lineno)
+                abs_path = _ABS_CACHE.get(filename)
+                if abs_path is None:
+                    abs_path = _ABS_CACHE[filename] = os.path.abspath(filename)
+                _record_line(executed_lines, abs_path, frame.f_lineno)
         return trace_function
 
     return executed_lines, trace_function
@@ -42,24 +123,24 @@ def _collect_coverage_with_monitoring():
     executed_lines = {}
     seen_code = set()
 
-    def on_call(code, instruction_offset):
-        filename = getattr(code, "co_filename", "")
-        if not _should_track(filename):
-            return
-        if code in seen_code:
-            return
-        seen_code.add(code)
-        mon.set_local_events(tool_id, code, mon.events.LINE)
+    def on_start(code, instruction_offset):
+        if _should_track(code.co_filename):
+            seen_code.add(code)
+            mon.set_local_events(tool_id, code, mon.events.LINE)
+        # Each code object only needs to be classified once per test
+        return mon.DISABLE
 
     def on_line(code, line_number):
-        filename = getattr(code, "co_filename", "")
-        if not _should_track(filename):
-            return
-        abs_path = os.path.abspath(filename)
-        executed_lines.setdefault(abs_path, set()).add(line_number)
+        filename = code.co_filename
+        abs_path = _ABS_CACHE.get(filename)
+        if abs_path is None:
+            abs_path = _ABS_CACHE[filename] = os.path.abspath(filename)
+        _record_line(executed_lines, abs_path, line_number)
+        # Only distinct lines matter, so stop reporting this one
+        return mon.DISABLE
 
     tool_id = None
-    for tid in range(1, mon.MAX_TOOL_ID + 1):
+    for tid in range(mon.COVERAGE_ID, _MAX_TOOL_ID + 1):
         try:
             mon.use_tool_id(tid, "taut_worker")
         except ValueError:
@@ -70,13 +151,17 @@ def _collect_coverage_with_monitoring():
     if tool_id is None:
         raise RuntimeError("No free sys.monitoring tool id")
 
-    mon.register_callback(tool_id, mon.events.CALL, on_call)
+    mon.register_callback(tool_id, mon.events.PY_START, on_start)
     mon.register_callback(tool_id, mon.events.LINE, on_line)
-    mon.set_events(tool_id, mon.events.CALL)
+    mon.set_events(tool_id, mon.events.PY_START)
+    # Re-enable events DISABLEd while collecting for a previous test
+    mon.restart_events()
 
     def uninstall():
         mon.set_events(tool_id, 0)
-        mon.register_callback(tool_id, mon.events.CALL, None)
+        for code in seen_code:
+            mon.set_local_events(tool_id, code, 0)
+        mon.register_callback(tool_id, mon.events.PY_START, None)
         mon.register_callback(tool_id, mon.events.LINE, None)
         mon.free_tool_id(tool_id)
 
@@ -102,32 +187,39 @@ def run_test(req):
     executed_lines = None
     uninstall = None
     trace_fn = None
+    out_buf = io.StringIO()
+    err_buf = io.StringIO()
 
     start = time.perf_counter()
 
     try:
         test_dir = os.path.dirname(os.path.abspath(test_file))
-        if test_dir not in sys.path:
-            sys.path.insert(0, test_dir)
+        if test_dir not in _SYSPATH_SET:
+            if test_dir not in sys.path:
+                sys.path.insert(0, test_dir)
+            _SYSPATH_SET.add(test_dir)
 
         if collect_coverage:
-            try:
-                executed_lines, uninstall = _collect_coverage_with_monitoring()
-            except Exception:
+            if sys.version_info >= (3, 12):
+                try:
+                    executed_lines, uninstall = _collect_coverage_with_monitoring()
+                except RuntimeError:
+                    pass  # No free tool id; fall back to settrace
+            if executed_lines is None:
                 executed_lines, trace_fn = _collect_coverage_with_settrace()
                 sys.settrace(trace_fn)
 
-        out_buf = io.StringIO()
-        err_buf = io.StringIO()
-
         # Use unique module name to avoid cache issues
         mod_name = f"taut_test_{request_id}"
 
-        with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
-            spec = importlib.util.spec_from_file_location(mod_name, test_file)
-            module = importlib.util.module_from_spec(spec)
+        sys.stdout, sys.stderr = out_buf, err_buf
+        try:
+            code = _compile_test_file(test_file)
+            module = types.ModuleType(mod_name)
+            module.__file__ = test_file
+            module.__package__ = ""
             sys.modules[mod_name] = module
-            spec.loader.exec_module(module)
+            exec(code, module.__dict__)
 
             if class_name:
                 cls = getattr(module, class_name)
@@ -146,21 +238,16 @@ def run_test(req):
                 test_func = getattr(module, test_name)
                 _run_maybe_async(test_func)
                 result["passed"] = True
+        finally:
+            sys.stdout, sys.stderr = _REAL_STDOUT, _REAL_STDERR
 
         # Clean up module from sys.modules
         sys.modules.pop(mod_name, None)
 
-        result["stdout"] = out_buf.getvalue()
-        result["stderr"] = err_buf.getvalue()
-
     except AssertionError as e:
-        result["stdout"] = out_buf.getvalue() if 'out_buf' in dir() else ""
-        result["stderr"] = err_buf.getvalue() if 'err_buf' in dir() else ""
-        result["error"] = {"message": str(e) or "Assertion failed", "traceback": traceback.format_exc()}
+        result["error"] = {"message": str(e) or "Assertion failed", "traceback": _LazyTraceback(e)}
     except Exception as e:
-        result["stdout"] = out_buf.getvalue() if 'out_buf' in dir() else ""
-        result["stderr"] = err_buf.getvalue() if 'err_buf' in dir() else ""
-        result["error"] = {"message": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+        result["error"] = {"message": f"{type(e).__name__}: {e}", "traceback": _LazyTraceback(e)}
 
     finally:
         if trace_fn is not None:
@@ -171,22 +258,58 @@ def run_test(req):
             except Exception:
                 pass
 
+        result["stdout"] = out_buf.getvalue()
+        result["stderr"] = err_buf.getvalue()
+
         if executed_lines is not None:
-            result["coverage"] = {k: sorted(v) for k, v in executed_lines.items()}
+            result["coverage"] = {
+                k: list(itertools.compress(range(len(v)), v)) for k, v in executed_lines.items()
+            }
 
         result["duration_sec"] = time.perf_counter() - start
 
     return result
 
 
+# The protocol talks to the raw pipe fds directly, bypassing the locking
+# BufferedReader/BufferedWriter behind sys.stdin.buffer/sys.stdout.buffer.
+_STDIN_FD = sys.stdin.fileno()
+_STDOUT_FD = sys.stdout.fileno()
+
+def _pack_default(obj):
+    if isinstance(obj, _LazyTraceback):
+        return str(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+# Reused for every response instead of constructing a Packer per packb() call
+_packer = msgpack.Packer(use_bin_type=True, default=_pack_default)
+
+
+def _readn(n):
+    """Read exactly n bytes from stdin, or fewer at EOF."""
+    chunk = os.read(_STDIN_FD, n)
+    if len(chunk) == n or not chunk:
+        return chunk
+
+    # Short read (large message split across pipe writes)
+    buf = bytearray(chunk)
+    while len(buf) < n:
+        chunk = os.read(_STDIN_FD, n - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
 def _read_message():
     """Read length-prefixed msgpack message from stdin."""
-    len_bytes = sys.stdin.buffer.read(4)
-    if not len_bytes or len(len_bytes) < 4:
+    len_bytes = _readn(4)
+    if len(len_bytes) < 4:
         return None
 
     length = struct.unpack('<I', len_bytes)[0]
-    data = sys.stdin.buffer.read(length)
+    data = _readn(length)
     if len(data) < length:
         return None
 
@@ -194,12 +317,27 @@ def _read_message():
 
 def _send_message(msg):
     """Send length-prefixed msgpack message to stdout."""
-    data = msgpack.packb(msg, use_bin_type=True)
-    length = struct.pack('<I', len(data))
-    sys.stdout.buffer.write(length + data)
-    sys.stdout.buffer.flush()
+    data = _packer.pack(msg)
+    view = memoryview(struct.pack('<I', len(data)) + data)
+    while view:
+        view = view[os.write(_STDOUT_FD, view):]
+
+def _prewarm():
+    """Do one-time lazy initialization before the first request arrives.
+
+    The first event loop and the first formatted traceback pull in
+    further modules and caches. Doing this at startup keeps that cost out
+    of the first test's measured duration.
+    """
+    asyncio.new_event_loop().close()
+    try:
+        raise ValueError("prewarm")
+    except ValueError as e:
+        str(_LazyTraceback(e))
+
 
 def main():
+    _prewarm()
     while True:
         try:
             req = _read_message()
@@ -1090,6 +1090,161 @@ fn coverage_works_in_async_test() -> Result<()> {
     Ok(())
 }
 
+#[test]
+fn coverage_collected_for_each_test_in_process_per_run() -> Result<()> {
+    // Both tests run in the same worker, so the second one must still report
+    // its own lines, the file's module-level lines and the helper it calls.
+    let tmp = TempDir::new()?;
+
+    write_file(
+        &tmp.path().join("shared_helper.py"),
+        &dedent(
+            r#"
+            def double(x):
+                return x * 2
+        "#,
+        ),
+    )?;
+
+    write_file(
+        &tmp.path().join("test_shared.py"),
+        &dedent(
+            r#"
+            from shared_helper import double
+
+            LIMIT = 10
+
+            def test_first():
+                assert double(1) == 2
+
+            def test_second():
+                value = double(2)
+                assert value < LIMIT
+        "#,
+        ),
+    )?;
+
+    let item1 = TestItem {
+        file: tmp.path().join("test_shared.py"),
+        function: "test_first".to_string(),
+        class: None,
+        line: 5,
+        markers: vec![],
+    };
+
+    let item2 = TestItem {
+        file: tmp.path().join("test_shared.py"),
+        function: "test_second".to_string(),
+        class: None,
+        line: 8,
+        markers: vec![],
+    };
+
+    let results = run_tests(
+        &[item1, item2],
+        false, // sequential, so both tests share one worker
+        None,
+        true,
+        IsolationMode::ProcessPerRun,
+        |_| {},
+    )?;
+
+    assert!(results.results[0].passed);
+    assert!(results.results[1].passed);
+
+    let coverage = results.results[1].coverage.as_ref().unwrap();
+
+    let (_, test_lines) = coverage
+        .files
+        .iter()
+        .find(|(path, _)| path.to_string_lossy().contains("test_shared.py"))
+        .expect("Should have coverage for test file");
+
+    for line in [9, 10] {
+        assert!(test_lines.contains(&line), "Missing test body line {line}");
+    }
+    for line in [1, 3, 5, 8] {
+        assert!(test_lines.contains(&line), "Missing module-level line {line}");
+    }
+    assert!(
+        !test_lines.contains(&6),
+        "Lines from the previous test should not be reported"
+    );
+
+    let (_, helper_lines) = coverage
+        .files
+        .iter()
+        .find(|(path, _)| path.to_string_lossy().contains("shared_helper.py"))
+        .expect("Should have coverage for imported helper");
+
+    assert!(helper_lines.contains(&2), "Missing helper body line");
+
+    Ok(())
+}
+
+#[test]
+fn edited_test_file_reloaded_in_process_per_run() -> Result<()> {
+    // The worker caches compiled test files; editing the file between
+    // requests must invalidate the cache so the new contents are executed.
+    let tmp = TempDir::new()?;
+
+    write_file(
+        &tmp.path().join("test_edit.py"),
+        &dedent(
+            r#"
+            VALUE = 1
+
+            def test_rewrites_file():
+                import pathlib
+                path = pathlib.Path(__file__)
+                path.write_text(path.read_text().replace("VALUE = 1\n", "VALUE = 22\n"))
+                assert VALUE == 1
+
+            def test_sees_new_value():
+                assert VALUE == 22
+        "#,
+        ),
+    )?;
+
+    let item1 = TestItem {
+        file: tmp.path().join("test_edit.py"),
+        function: "test_rewrites_file".to_string(),
+        class: None,
+        line: 3,
+        markers: vec![],
+    };
+
+    let item2 = TestItem {
+        file: tmp.path().join("test_edit.py"),
+        function: "test_sees_new_value".to_string(),
+        class: None,
+        line: 9,
+        markers: vec![],
+    };
+
+    let results = run_tests(
+        &[item1, item2],
+        false, // sequential, so both tests share one worker
+        None,
+        true,
+        IsolationMode::ProcessPerRun,
+        |_| {},
+    )?;
+
+    assert!(
+        results.results[0].passed,
+        "Rewriting test should pass. Error: {:?}",
+        results.results[0].error
+    );
+    assert!(
+        results.results[1].passed,
+        "Edited test file should be re-executed: {:?}",
+        results.results[1].error
+    );
+
+    Ok(())
+}
+
 // =============================================================================
 // Error Handling Tests
 // =============================================================================